@@ -1,16 +1,22 @@
 import os
 import base64
 import io
-import threading
-import time
 import re
 import asyncio
+import hashlib
+import logging
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
 from dotenv import load_dotenv
-import openai
-from gtts import gTTS
 import socketio
 from fastapi import FastAPI
 from fastapi.staticfiles import StaticFiles
+from tts_cache import synth
+import openai_rest
+
+logging.basicConfig(level=logging.INFO)
+log = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -18,61 +24,101 @@ api_key = os.getenv("API_KEY")
 if not api_key:
     raise RuntimeError("API_KEY not found in environment. Please add API_KEY=sk-... to your .env file.")
 
-client = openai.OpenAI(api_key=api_key)
-
 FALLBACK_MESSAGE = "I cannot reply to this question. Please ask something related to Indian tourism."
 PAUSE_MESSAGE = "Paused. You can ask your next question whenever you're ready."
 PROMPT_AFTER_PAUSE = "Please ask me the question, or would you like me to resume my previous response?"
 
-# In-memory state for single user
-paused_state = {
+# Synthesis blocks (Piper is CPU-bound, gTTS makes an HTTPS call), so it runs on a dedicated pool
+tts_pool = ThreadPoolExecutor(max_workers=int(os.getenv("TTS_POOL_SIZE", "4")))
+
+async def synth_async(text):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(tts_pool, synth, text)
+
+# Audio for the fixed prompts, synthesized on startup (or on first use if that failed)
+STATIC_AUDIO = {}
+
+async def static_audio(text):
+    if text not in STATIC_AUDIO:
+        STATIC_AUDIO[text] = await synth_async(text)
+    return STATIC_AUDIO[text]
+
+# In-memory pause/resume state, one entry per connected client
+paused_state = defaultdict(lambda: {
     'response_text': None,
     'position': 0,
     'is_paused': False,
-    'timer': None
-}
+    'timer': None,
+    'tts_sentences': []
+})
+
+# Response task currently streaming for each client
+active_tasks = {}
+
+# Streamed deltas are coalesced into response_chunk events of at least this
+# many characters, or whatever has accumulated after this many seconds
+RESPONSE_CHUNK_MIN_CHARS = 32
+RESPONSE_CHUNK_MAX_DELAY = 0.05
+
+# Visitors ask the same questions over and over, so complete replies are
+# cached by normalized transcript. Only the text and its TTS sentences are
+# kept; the audio itself comes back out of the per-sentence TTS cache.
+response_cache = TTLCache(maxsize=1000, ttl=3600)
 
-current_response_event = threading.Event()
-current_response_event.set()  # Initially set so first response can run
+def response_cache_key(transcript):
+    normalized = " ".join(transcript.lower().split())
+    return hashlib.sha1(normalized.encode()).hexdigest()
+
+_MD_RE = re.compile(r'[*/_`]')
+_URL_RE = re.compile(r'https?://\S+')
+_DOMAIN_RE = re.compile(r'https?://(?:www\.)?([^/]+)')
+_SENTENCE_END_RE = re.compile(r'[.!?]\s')
+
+def _url_replacer(match):
+    domain = _DOMAIN_RE.findall(match.group(0))
+    if domain:
+        return f'Check {domain[0]} for more information'
+    return ''
 
 def clean_text_for_tts(text):
     # Remove markdown symbols
-    text = re.sub(r'[*/_`]', '', text)
+    text = _MD_RE.sub('', text)
     # Replace URLs with site names
-    def url_replacer(match):
-        url = match.group(0)
-        domain = re.findall(r'https?://(?:www\.)?([^/]+)', url)
-        if domain:
-            return f'Check {domain[0]} for more information'
-        return ''
-    text = re.sub(r'https?://\S+', url_replacer, text)
+    text = _URL_RE.sub(_url_replacer, text)
     return text
 
-def ensure_english(text):
-    translation_prompt = [
-        {"role": "system", "content": "Translate the following text to English. If it is already in English, just repeat it."},
-        {"role": "user", "content": text}
-    ]
-    translation_resp = client.chat.completions.create(
-        model="gpt-4o",
-        messages=translation_prompt,
-        stream=False
-    )
-    return translation_resp.choices[0].message.content
+async def pause_prompt(sio, sid):
+    await asyncio.sleep(5)
+    if paused_state[sid]['is_paused']:
+        await sio.emit('response_chunk', {'text': PROMPT_AFTER_PAUSE}, to=sid)
+        try:
+            audio_bytes = await static_audio(PROMPT_AFTER_PAUSE)
+        except Exception:
+            log.exception("Could not synthesize pause prompt audio")
+            await sio.emit('response_done', {}, to=sid)
+            return
+        await sio.emit('audio_response', {'audio': audio_bytes}, to=sid)
+
+async def send_fallback(sid):
+    await sio.emit('response_chunk', {'text': FALLBACK_MESSAGE}, to=sid)
+    try:
+        audio_bytes = await static_audio(FALLBACK_MESSAGE)
+    except Exception:
+        log.exception("Could not synthesize fallback audio")
+        # Text only; response_done still lets the client start listening again
+        await sio.emit('response_done', {}, to=sid)
+        return
+    await sio.emit('audio_response', {'audio': audio_bytes}, to=sid)
 
 def start_pause_timer(sio, sid):
-    def timer_func():
-        time.sleep(5)
-        if paused_state['is_paused']:
-            sio.emit('response_chunk', {'text': PROMPT_AFTER_PAUSE}, to=sid)
-            tts = gTTS(text=PROMPT_AFTER_PAUSE, lang='en')
-            audio_buffer = io.BytesIO()
-            tts.write_to_fp(audio_buffer)
-            audio_buffer.seek(0)
-            audio_base64 = base64.b64encode(audio_buffer.read()).decode('utf-8')
-            sio.emit('audio_response', {'audio': audio_base64}, to=sid)
-    paused_state['timer'] = threading.Thread(target=timer_func)
-    paused_state['timer'].start()
+    cancel_pause_timer(sid)
+    paused_state[sid]['timer'] = asyncio.create_task(pause_prompt(sio, sid))
+
+def cancel_pause_timer(sid):
+    state = paused_state.get(sid)
+    if state and state['timer']:
+        state['timer'].cancel()
+        state['timer'] = None
 
 # Use only the deployed frontend and localhost for CORS
 ALLOWED_ORIGINS = [
@@ -88,53 +134,115 @@ sio = socketio.AsyncServer(
 )
 app = FastAPI()
 
+@app.on_event("startup")
+async def use_tts_pool_as_default_executor():
+    asyncio.get_running_loop().set_default_executor(tts_pool)
+
+@app.on_event("startup")
+async def warm_static_audio():
+    for text in (FALLBACK_MESSAGE, PROMPT_AFTER_PAUSE):
+        try:
+            await static_audio(text)
+        except Exception:
+            log.exception("Could not pre-synthesize audio for %r", text)
+
+@app.on_event("startup")
+async def open_openai_session():
+    await openai_rest.open_session(api_key)
+
+@app.on_event("shutdown")
+async def close_openai_session():
+    await openai_rest.close_session()
+
 @sio.event
 async def connect(sid, environ):
-    print(f"Client connected: {sid}")
+    log.info("Client connected: %s", sid)
 
 @sio.event
 async def disconnect(sid):
-    print(f"Client disconnected: {sid}")
+    log.info("Client disconnected: %s", sid)
+    task = active_tasks.pop(sid, None)
+    if task:
+        task.cancel()
+    cancel_pause_timer(sid)
+    paused_state.pop(sid, None)
+
+# Events that belong to a streamed reply (text chunks, sentence audio and the
+# closing response_done) carry 'partial': True so a paused client can drop them.
+async def tts_worker(queue, sid, tts_sentences):
+    # Synthesize and emit one sentence at a time until a None sentinel arrives
+    while True:
+        sentence = await queue.get()
+        if sentence is None:
+            break
+        tts_text = clean_text_for_tts(sentence).strip()
+        if tts_text:
+            audio_bytes = await synth_async(tts_text)
+            tts_sentences.append(tts_text)
+            await sio.emit('audio_response', {'audio': audio_bytes, 'partial': True}, to=sid)
+
+async def replay_cached_response(sid, response_text, tts_sentences):
+    for i in range(0, len(response_text), RESPONSE_CHUNK_MIN_CHARS):
+        await sio.emit('response_chunk', {'text': response_text[i:i + RESPONSE_CHUNK_MIN_CHARS], 'partial': True}, to=sid)
+    for tts_text in tts_sentences:
+        audio_bytes = await synth_async(tts_text)
+        await sio.emit('audio_response', {'audio': audio_bytes, 'partial': True}, to=sid)
+    await sio.emit('response_done', {'partial': True}, to=sid)
+
+def forget_task(sid, task):
+    if active_tasks.get(sid) is task:
+        del active_tasks[sid]
 
 @sio.on('audio_chunk')
 async def handle_audio_chunk(sid, data):
-    global current_response_event
-    print(f"Received audio_chunk from {sid}")
-    try:
-        if current_response_event.is_set() is False:
-            current_response_event.set()
-            time.sleep(0.1)
-        current_response_event = threading.Event()
+    log.debug("Received audio_chunk from %s", sid)
+    cancel_pause_timer(sid)
+    # A new question cancels whatever response is still streaming for this client.
+    # The new task is registered before any await so a concurrent audio_chunk
+    # sees (and cancels) it rather than slipping in untracked.
+    prev = active_tasks.get(sid)
+    task = asyncio.create_task(respond_to_audio(sid, data, prev))
+    active_tasks[sid] = task
+    task.add_done_callback(lambda t: forget_task(sid, t))
+    if prev:
+        prev.cancel()
 
+async def respond_to_audio(sid, data, prev=None):
+    # Let the superseded response unwind before this one starts emitting
+    if prev:
+        await asyncio.gather(prev, return_exceptions=True)
+    try:
         transcript = None
         try:
-            audio_data = base64.b64decode(data['audio'])
-            audio_file = io.BytesIO(audio_data)
+            # Recordings arrive as raw bytes; dict payloads carry base64 audio
+            if isinstance(data, (bytes, bytearray)):
+                audio_file = io.BytesIO(data)
+            else:
+                audio_file = io.BytesIO(base64.b64decode(data['audio'], validate=False))
             audio_file.name = "audio.wav"
-            print("Transcribing audio...")
-            transcription = client.audio.transcriptions.create(
-                model="whisper-1",
-                file=audio_file
-            )
-            transcript = transcription.text.strip()
-            print(f"Transcript: {transcript}")
-        except Exception as e:
-            print("Error in transcription:", e)
+            log.debug("Transcribing audio...")
+            transcript = (await openai_rest.transcribe_to_english(audio_file)).strip()
+            log.debug("Transcript: %s", transcript)
+        except Exception:
+            log.exception("Error in transcription")
             transcript = None
 
         if not transcript or transcript.strip() == "":
-            print("Transcript is empty or None. Sending fallback.")
-            await sio.emit('response_chunk', {'text': FALLBACK_MESSAGE}, to=sid)
-            tts = gTTS(text=FALLBACK_MESSAGE, lang='en')
-            buf = io.BytesIO()
-            tts.write_to_fp(buf)
-            buf.seek(0)
-            audio_b64 = base64.b64encode(buf.read()).decode('utf-8')
-            await sio.emit('audio_response', {'audio': audio_b64}, to=sid)
-            current_response_event.set()
+            log.debug("Transcript is empty or None. Sending fallback.")
+            await send_fallback(sid)
             return
-        else:
-            print(f"Transcript sent to LLM: {transcript}")
+
+        response_key = response_cache_key(transcript)
+        cached = response_cache.get(response_key)
+        if cached:
+            log.debug("Serving cached response for: %s", transcript)
+            response_text, tts_sentences = cached
+            await replay_cached_response(sid, response_text, tts_sentences)
+            paused_state[sid]['response_text'] = response_text
+            paused_state[sid]['tts_sentences'] = tts_sentences
+            paused_state[sid]['position'] = 0
+            return
+        log.debug("Transcript sent to LLM: %s", transcript)
 
         system_prompt = (
             "You are an expert on Indian tourism. "
@@ -148,108 +256,111 @@ async def handle_audio_chunk(sid, data):
         ]
 
         response_text = ""
-        def stream_llm_and_tts():
-            nonlocal response_text
-            try:
-                print("Streaming LLM response...")
-                stream = client.chat.completions.create(
-                    model="gpt-4o",
-                    messages=messages,
-                    stream=True
-                )
-                for chunk in stream:
-                    if current_response_event.is_set():
-                        break
-                    delta = chunk.choices[0].delta.content if chunk.choices[0].delta else None
-                    if delta:
-                        response_text += delta
-                        asyncio.run(sio.emit('response_chunk', {'text': delta}, to=sid))
-                print(f"LLM response: {response_text}")
-                if response_text and not current_response_event.is_set():
-                    print(f"Final LLM response: {response_text}")
-                    tts_text = clean_text_for_tts(response_text)
-                    tts = gTTS(text=tts_text, lang='en')
-                    buf = io.BytesIO()
-                    tts.write_to_fp(buf)
-                    buf.seek(0)
-                    audio_b64 = base64.b64encode(buf.read()).decode('utf-8')
-                    asyncio.run(sio.emit('audio_response', {'audio': audio_b64}, to=sid))
-            except Exception as e:
-                print("Error in stream_llm_and_tts:", e)
-                # Always send fallback message/audio if LLM or TTS fails
-                asyncio.run(sio.emit('response_chunk', {'text': FALLBACK_MESSAGE}, to=sid))
-                tts = gTTS(text=FALLBACK_MESSAGE, lang='en')
-                buf = io.BytesIO()
-                tts.write_to_fp(buf)
-                buf.seek(0)
-                audio_b64 = base64.b64encode(buf.read()).decode('utf-8')
-                asyncio.run(sio.emit('audio_response', {'audio': audio_b64}, to=sid))
-            finally:
-                current_response_event.set()
-        t = threading.Thread(target=stream_llm_and_tts)
-        t.start()
-        t.join()
-        paused_state['response_text'] = response_text
-        paused_state['position'] = 0
-    except Exception as e:
-        import traceback
-        print("Error in handle_audio_chunk:")
-        traceback.print_exc()
+        tts_sentences = []
+        # Sentences are synthesized while the LLM keeps streaming
+        sentence_queue = asyncio.Queue()
+        tts_task = asyncio.create_task(tts_worker(sentence_queue, sid, tts_sentences))
+        try:
+            log.debug("Streaming LLM response...")
+            loop = asyncio.get_running_loop()
+            pending = ""
+            unsent_text = ""
+            last_emit = loop.time()
+            async for delta in openai_rest.stream_chat(messages):
+                response_text += delta
+                pending += delta
+                unsent_text += delta
+                match = _SENTENCE_END_RE.search(pending)
+                # Text always goes out before the audio of any sentence it completes
+                if (match or len(unsent_text) >= RESPONSE_CHUNK_MIN_CHARS
+                        or loop.time() - last_emit > RESPONSE_CHUNK_MAX_DELAY):
+                    await sio.emit('response_chunk', {'text': unsent_text, 'partial': True}, to=sid)
+                    unsent_text = ""
+                    last_emit = loop.time()
+                while match:
+                    await sentence_queue.put(pending[:match.end()])
+                    pending = pending[match.end():]
+                    match = _SENTENCE_END_RE.search(pending)
+            if unsent_text:
+                await sio.emit('response_chunk', {'text': unsent_text, 'partial': True}, to=sid)
+            log.debug("LLM response: %s", response_text)
+            if pending.strip():
+                await sentence_queue.put(pending)
+            await sentence_queue.put(None)
+            await tts_task
+            await sio.emit('response_done', {'partial': True}, to=sid)
+            response_cache[response_key] = (response_text, tts_sentences)
+        except Exception:
+            log.exception("Error in LLM/TTS streaming")
+            # Always send fallback message/audio if LLM or TTS fails
+            await send_fallback(sid)
+        finally:
+            tts_task.cancel()
+        paused_state[sid]['response_text'] = response_text
+        paused_state[sid]['tts_sentences'] = tts_sentences
+        paused_state[sid]['position'] = 0
+    except Exception:
+        log.exception("Error in respond_to_audio")
         # Always send fallback message/audio if something else fails
-        await sio.emit('response_chunk', {'text': FALLBACK_MESSAGE}, to=sid)
-        tts = gTTS(text=FALLBACK_MESSAGE, lang='en')
-        buf = io.BytesIO()
-        tts.write_to_fp(buf)
-        buf.seek(0)
-        audio_b64 = base64.b64encode(buf.read()).decode('utf-8')
-        await sio.emit('audio_response', {'audio': audio_b64}, to=sid)
-        current_response_event.set()
+        await send_fallback(sid)
 
 @sio.on('pause')
 async def handle_pause(sid):
-    print(f"Pause requested by {sid}")
-    paused_state['is_paused'] = True
+    log.debug("Pause requested by %s", sid)
+    paused_state[sid]['is_paused'] = True
     # The current response_text and position should already be tracked during streaming
     await sio.emit('response_chunk', {'text': PAUSE_MESSAGE}, to=sid)
 
 @sio.on('resume')
 async def handle_resume(sid):
-    print(f"Resume requested by {sid}")
-    if paused_state['is_paused'] and paused_state['response_text']:
-        paused_state['is_paused'] = False
+    log.debug("Resume requested by %s", sid)
+    cancel_pause_timer(sid)
+    state = paused_state[sid]
+    if state['is_paused'] and state['response_text']:
+        state['is_paused'] = False
         # Resume streaming from the last paused position
-        response_text = paused_state['response_text']
-        position = paused_state['position']
-        remaining_text = response_text[position:]
+        response_text = state['response_text']
+        position = state['position']
         chunk_size = 100  # Adjust as needed for streaming granularity
         while position < len(response_text):
-            if paused_state['is_paused']:
+            if state['is_paused']:
                 break
             chunk = response_text[position:position+chunk_size]
-            await sio.emit('response_chunk', {'text': chunk}, to=sid)
+            await sio.emit('response_chunk', {'text': chunk, 'partial': True}, to=sid)
             position += chunk_size
-            paused_state['position'] = position
+            state['position'] = position
             await asyncio.sleep(0.1)  # Simulate streaming delay
-        # After finishing, send TTS audio again for the remaining text
-        tts_text = clean_text_for_tts(remaining_text)
-        tts = gTTS(text=tts_text, lang='en')
-        buf = io.BytesIO()
-        tts.write_to_fp(buf)
-        buf.seek(0)
-        audio_b64 = base64.b64encode(buf.read()).decode('utf-8')
-        await sio.emit('audio_response', {'audio': audio_b64}, to=sid)
-        paused_state['response_text'] = None
-        paused_state['position'] = 0
+        # Replay the reply's audio sentence by sentence; every clip is
+        # already in the TTS cache from when the reply was first streamed
+        for tts_text in state['tts_sentences']:
+            if state['is_paused']:
+                break
+            audio_bytes = await synth_async(tts_text)
+            await sio.emit('audio_response', {'audio': audio_bytes, 'partial': True}, to=sid)
+        await sio.emit('response_done', {'partial': True}, to=sid)
+        state['response_text'] = None
+        state['tts_sentences'] = []
+        state['position'] = 0
 
 # Mount Socket.IO ASGI app onto FastAPI
 app.mount("/socket.io", socketio.ASGIApp(sio, socketio_path="/socket.io"))
 
-# Serve React static files from frontend/build
-app.mount(
-    "/",
-    StaticFiles(directory=os.path.join(os.path.dirname(__file__), "../frontend/build"), html=True),
-    name="static"
-)
+class CachedStaticFiles(StaticFiles):
+    # CRA fingerprints everything under static/, so it can be cached forever
+    async def get_response(self, path, scope):
+        response = await super().get_response(path, scope)
+        if path.startswith("static/"):
+            response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+        return response
+
+# The React build is normally served by nginx (see deploy/nginx.conf); set
+# SERVE_FRONTEND=1 to serve it from this process instead
+if os.getenv("SERVE_FRONTEND") == "1":
+    app.mount(
+        "/",
+        CachedStaticFiles(directory=os.path.join(os.path.dirname(__file__), "../frontend/build"), html=True),
+        name="static"
+    )
 
 @app.get("/")
 def root():
@@ -260,14 +371,9 @@ def test():
     return {"status": "ok"}
 
 @app.get("/test-openai")
-def test_openai():
+async def test_openai():
     try:
-        resp = client.chat.completions.create(
-            model="gpt-4o",
-            messages=[{"role": "user", "content": "Hello"}],
-            stream=False
-        )
-        return {"result": resp.choices[0].message.content}
+        result = await openai_rest.complete_chat([{"role": "user", "content": "Hello"}])
+        return {"result": result}
     except Exception as e:
-        import traceback
         return {"error": str(e)} 
\ No newline at end of file
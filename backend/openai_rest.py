@@ -0,0 +1,78 @@
+import os
+import json
+import asyncio
+import aiohttp
+
+# All OpenAI calls go straight to the REST API over one pooled, keep-alive
+# aiohttp session instead of through the OpenAI SDK's httpx client.
+OPENAI_API_BASE = os.getenv("OPENAI_API_BASE", "https://api.openai.com/v1")
+
+# Caps in-flight requests so a burst of clients doesn't run straight into
+# rate limits; 429s are retried with exponential backoff
+OPENAI_SEM = asyncio.Semaphore(int(os.getenv("OPENAI_CONCURRENCY", "16")))
+MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+RETRY_BASE_DELAY = 1.0
+
+session = None
+
+async def open_session(api_key):
+    global session
+    session = aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=100, ttl_dns_cache=300),
+        headers={"Authorization": f"Bearer {api_key}"}
+    )
+
+async def close_session():
+    global session
+    if session:
+        await session.close()
+        session = None
+
+async def _post(path, make_body):
+    # make_body() builds the request kwargs afresh for every attempt,
+    # since a FormData body can only be sent once
+    for attempt in range(MAX_RETRIES + 1):
+        resp = await session.post(f"{OPENAI_API_BASE}{path}", **make_body())
+        if resp.status == 429 and attempt < MAX_RETRIES:
+            resp.release()
+            await asyncio.sleep(RETRY_BASE_DELAY * 2 ** attempt)
+            continue
+        resp.raise_for_status()
+        return resp
+
+async def transcribe_to_english(audio_file, model="whisper-1"):
+    # The translations endpoint returns English text whatever the spoken language
+    audio_data = audio_file.getvalue()
+    def make_body():
+        form = aiohttp.FormData()
+        form.add_field('model', model)
+        form.add_field('file', audio_data, filename=audio_file.name)
+        return {'data': form}
+    async with OPENAI_SEM:
+        async with await _post("/audio/translations", make_body) as resp:
+            return (await resp.json())['text']
+
+async def complete_chat(messages, model="gpt-4o"):
+    payload = {"model": model, "messages": messages, "stream": False}
+    async with OPENAI_SEM:
+        async with await _post("/chat/completions", lambda: {'json': payload}) as resp:
+            return (await resp.json())['choices'][0]['message']['content']
+
+async def stream_chat(messages, model="gpt-4o"):
+    # Yields content deltas parsed from the server-sent event stream
+    payload = {"model": model, "messages": messages, "stream": True}
+    async with OPENAI_SEM:
+        async with await _post("/chat/completions", lambda: {'json': payload}) as resp:
+            async for line in resp.content:
+                line = line.strip()
+                if not line.startswith(b"data: "):
+                    continue
+                data = line[len(b"data: "):]
+                if data == b"[DONE]":
+                    break
+                choices = json.loads(data).get('choices')
+                if not choices:
+                    continue
+                delta = (choices[0].get('delta') or {}).get('content')
+                if delta:
+                    yield delta
@@ -1,13 +1,15 @@
-from flask import Flask
-from flask_socketio import SocketIO
+import socketio
+import uvicorn
+from fastapi import FastAPI
 
-app = Flask(__name__)
-socketio = SocketIO(app, cors_allowed_origins="*", async_mode='gevent')
+sio = socketio.AsyncServer(async_mode='asgi', cors_allowed_origins="*")
+app = FastAPI()
+app.mount("/socket.io", socketio.ASGIApp(sio, socketio_path="/socket.io"))
 
-@app.route('/')
+@app.get('/')
 def index():
     return "Test server is running!"
 
 if __name__ == '__main__':
     print("About to start minimal SocketIO server...")
-    socketio.run(app, debug=False, host='0.0.0.0', port=5000) 
\ No newline at end of file
+    uvicorn.run(app, host='0.0.0.0', port=5000)
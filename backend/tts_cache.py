@@ -0,0 +1,115 @@
+import os
+import io
+import hashlib
+import tempfile
+import functools
+import threading
+import wave
+from gtts import gTTS
+from piper.voice import PiperVoice
+
+# Synthesized audio is content-addressed by (lang, text) so repeated
+# utterances are never synthesized twice.
+CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(os.path.dirname(__file__), ".tts_cache"))
+MEMORY_CACHE_SIZE = int(os.getenv("TTS_MEMORY_CACHE_SIZE", "256"))
+DISK_CACHE_BYTES = int(os.getenv("TTS_DISK_CACHE_BYTES", str(200 * 1024 * 1024)))
+PIPER_VOICE_PATH = os.getenv("PIPER_VOICE_PATH", os.path.join(os.path.dirname(__file__), "en_US-lessac-medium.onnx"))
+
+os.makedirs(CACHE_DIR, exist_ok=True)
+
+# Piper runs in-process; gTTS (a network call per utterance) is only used
+# when no Piper voice model has been installed, or for languages other than
+# English since the Piper voice is en_US
+voice = PiperVoice.load(PIPER_VOICE_PATH) if os.path.exists(PIPER_VOICE_PATH) else None
+
+def _uses_piper(lang):
+    return voice is not None and lang == 'en'
+
+def cache_key(text, lang='en'):
+    return hashlib.sha1(f"{lang}|{text}".encode()).hexdigest()
+
+def _synthesize(text, lang):
+    buf = io.BytesIO()
+    if _uses_piper(lang):
+        with wave.open(buf, 'wb') as wav_file:
+            voice.synthesize_wav(text, wav_file)
+    else:
+        gTTS(text=text, lang=lang).write_to_fp(buf)
+    return buf.getvalue()
+
+def _write_atomic(path, data):
+    fd, tmp_path = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+# Running size of the disk cache, so the directory is only scanned when the
+# budget is crossed; eviction then trims down to 90% of the budget
+_disk_usage = None
+_disk_lock = threading.Lock()
+
+def _scan_disk_cache():
+    entries = []
+    with os.scandir(CACHE_DIR) as it:
+        for entry in it:
+            if not entry.name.endswith((".wav", ".mp3")):
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+    return entries
+
+def _evict_disk_cache(entries):
+    # Drop the least recently used files until the cache fits its low-water mark
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= DISK_CACHE_BYTES * 0.9:
+            break
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+def _account_write(size):
+    global _disk_usage
+    with _disk_lock:
+        if _disk_usage is None:
+            _disk_usage = sum(entry[1] for entry in _scan_disk_cache())
+        else:
+            _disk_usage += size
+        if _disk_usage > DISK_CACHE_BYTES:
+            _disk_usage = _evict_disk_cache(_scan_disk_cache())
+
+def _cache_path(text, lang):
+    ext = "wav" if _uses_piper(lang) else "mp3"
+    return os.path.join(CACHE_DIR, f"{cache_key(text, lang)}.{ext}")
+
+@functools.lru_cache(maxsize=MEMORY_CACHE_SIZE)
+def _load(text, lang):
+    path = _cache_path(text, lang)
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        pass
+    audio = _synthesize(text, lang)
+    _write_atomic(path, audio)
+    _account_write(len(audio))
+    return audio
+
+def synth(text, lang='en') -> bytes:
+    audio = _load(text, lang)
+    # Mark as recently used, including memory hits, so eviction keeps hot clips
+    try:
+        os.utime(_cache_path(text, lang))
+    except FileNotFoundError:
+        pass
+    return audio
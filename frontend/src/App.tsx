@@ -76,10 +76,18 @@ const App: React.FC = () => {
   const botResponseBuffer = useRef<string>('');
   const recognitionRef = useRef<SpeechRecognition | null>(null);
   const recognitionRestartTimeout = useRef<number | null>(null);
-  const lastTTSRef = useRef<string | null>(null); // base64 audio
+  const lastTTSRef = useRef<ArrayBuffer | null>(null); // WAV or MP3 bytes
+  const audioQueueRef = useRef<ArrayBuffer[]>([]); // audio clips waiting to play
+  const replyInProgressRef = useRef(false);
+  const awaitingMoreAudioRef = useRef(false); // more sentences of the current reply are on their way
+  const isPausedRef = useRef(false); // read from socket handlers, which don't see fresh state
   const lastResponseTextRef = useRef<string | null>(null);
   const resumeTimeoutRef = useRef<number | null>(null);
 
+  useEffect(() => {
+    isPausedRef.current = isPaused;
+  }, [isPaused]);
+
   // Initialize Web Speech API
   useEffect(() => {
     const SpeechRecognition = (window as any).SpeechRecognition || (window as any).webkitSpeechRecognition;
@@ -143,14 +151,9 @@ const App: React.FC = () => {
     };
   }, []);
 
-  // Helper to convert blob to base64 and send to backend
+  // Helper to send the recording to the backend as a binary frame
   const sendAudioChunk = useCallback((blob: Blob) => {
-    const reader = new FileReader();
-    reader.onloadend = () => {
-      const base64Audio = (reader.result as string).split(',')[1];
-      socketRef.current?.emit('audio_chunk', { audio: base64Audio });
-    };
-    reader.readAsDataURL(blob);
+    socketRef.current?.emit('audio_chunk', blob);
   }, []);
 
   // Voice activity detection using Web Audio API
@@ -272,6 +275,43 @@ const App: React.FC = () => {
     recorder.start();
   }, [monitorVoiceActivity, sendAudioChunk, stopListening]);
 
+  // Drop any queued sentence audio and stop the current clip
+  const stopAudioPlayback = useCallback(() => {
+    audioQueueRef.current = [];
+    replyInProgressRef.current = false;
+    awaitingMoreAudioRef.current = false;
+    if (audioRef.current) {
+      audioRef.current.onended = null;
+      audioRef.current.pause();
+      audioRef.current.currentTime = 0;
+      audioRef.current = null;
+    }
+  }, []);
+
+  // Play queued sentence audio in order; listen again once the reply is done
+  const playNextAudio = useCallback(() => {
+    const next = audioQueueRef.current.shift();
+    if (next === undefined) {
+      audioRef.current = null;
+      if (awaitingMoreAudioRef.current) return;
+      replyInProgressRef.current = false;
+      setHasVoiceActivity(false);
+      startListening();
+      return;
+    }
+    // No explicit type: the browser sniffs WAV (Piper) or MP3 (gTTS)
+    const audioUrl = URL.createObjectURL(new Blob([next]));
+    const audio = new Audio(audioUrl);
+    audioRef.current = audio;
+    audio.onended = () => {
+      URL.revokeObjectURL(audioUrl);
+      playNextAudio();
+    };
+    audio.play();
+  }, [startListening]);
+
+  // One socket for the lifetime of the page, so the sid (and the server's
+  // per-session state) survives listening/pause toggles
   useEffect(() => {
     // Use the same origin in production, or localhost in development
     const backendUrl =
@@ -298,13 +338,24 @@ const App: React.FC = () => {
       setConnectionError(false);
     });
 
-    socketRef.current.on('pause', (data: { message: string }) => {
+    return () => {
+      socketRef.current?.disconnect();
+      if (audioContextRef.current) audioContextRef.current.close();
+      if (animationFrameRef.current) cancelAnimationFrame(animationFrameRef.current);
+      if (voiceActivityTimeoutRef.current) clearTimeout(voiceActivityTimeoutRef.current);
+    };
+  }, []);
+
+  // Handlers are re-bound when the callbacks they use change, without
+  // replacing the socket: the server keys pause/resume state by its sid
+  useEffect(() => {
+    const socket = socketRef.current;
+    if (!socket) return;
+
+    socket.on('pause', (data: { message: string }) => {
       setIsPaused(true);
       setHasVoiceActivity(false);
-      if (audioRef.current) {
-        audioRef.current.pause();
-        audioRef.current.currentTime = 0;
-      }
+      stopAudioPlayback();
       // On pause, also display the full response buffer if any
       if (botResponseBuffer.current.trim() !== '') {
         setMessages(prev => [...prev, botResponseBuffer.current.trim()]);
@@ -316,40 +367,53 @@ const App: React.FC = () => {
     });
 
     // Streaming text chunks: buffer only, do not update messages
-    socketRef.current.on('response_chunk', (data: { text: string }) => {
+    socket.on('response_chunk', (data: { text: string; partial?: boolean }) => {
+      // The server keeps streaming after a pause; resume re-sends the reply
+      if (data.partial && isPausedRef.current) return;
       botResponseBuffer.current += data.text;
     });
 
-    // Final audio + text: show full response as a new block
-    socketRef.current.on('audio_response', (data: { audio: string }) => {
+    // Show buffered text, extending the current reply's block if one is in progress
+    const flushResponseBuffer = () => {
+      const bufferText = botResponseBuffer.current.trim();
+      console.log('flushResponseBuffer: buffer =', bufferText);
+      if (!bufferText) return;
+      const continuesReply = replyInProgressRef.current;
+      setMessages(prev => {
+        const newMessages = continuesReply && prev.length > 0
+          ? [...prev.slice(0, -1), `${prev[prev.length - 1]} ${bufferText}`]
+          : [...prev, bufferText];
+        console.log('setMessages: newMessages =', newMessages);
+        return newMessages;
+      });
+      lastResponseTextRef.current = continuesReply && lastResponseTextRef.current
+        ? `${lastResponseTextRef.current} ${bufferText}`
+        : bufferText;
+      replyInProgressRef.current = true;
+      botResponseBuffer.current = '';
+    };
+
+    // Audio may arrive one sentence at a time (partial) ahead of response_done
+    socket.on('audio_response', (data: { audio: ArrayBuffer; partial?: boolean }) => {
+      if (data.partial && isPausedRef.current) return;
       setHasVoiceActivity(true);
       setIsLoading(false);
-      if (audioRef.current) {
-        audioRef.current.pause();
-        audioRef.current.currentTime = 0;
-      }
-      const bufferText = botResponseBuffer.current.trim();
-      console.log('audio_response: buffer =', bufferText);
-      if (bufferText) {
-        setMessages(prev => {
-          const newMessages = [...prev, bufferText];
-          console.log('setMessages: newMessages =', newMessages);
-          return newMessages;
-        });
-        lastResponseTextRef.current = bufferText;
-        botResponseBuffer.current = '';
-      }
+      flushResponseBuffer();
+      awaitingMoreAudioRef.current = data.partial === true;
       lastTTSRef.current = data.audio;
-      const audio = new Audio(`data:audio/mp3;base64,${data.audio}`);
-      audioRef.current = audio;
-      audio.play();
-      audio.onended = () => {
-        setHasVoiceActivity(false);
-        startListening();
-      };
+      audioQueueRef.current.push(data.audio);
+      if (!audioRef.current) playNextAudio();
+    });
+
+    socket.on('response_done', (data: { partial?: boolean }) => {
+      if (data.partial && isPausedRef.current) return;
+      setIsLoading(false);
+      flushResponseBuffer();
+      awaitingMoreAudioRef.current = false;
+      if (!audioRef.current) playNextAudio();
     });
 
-    socketRef.current.on('error', (data: { message: string }) => {
+    socket.on('error', (data: { message: string }) => {
       setIsPaused(false);
       setHasVoiceActivity(false);
       setIsLoading(false);
@@ -357,12 +421,13 @@ const App: React.FC = () => {
     });
 
     return () => {
-      socketRef.current?.disconnect();
-      if (audioContextRef.current) audioContextRef.current.close();
-      if (animationFrameRef.current) cancelAnimationFrame(animationFrameRef.current);
-      if (voiceActivityTimeoutRef.current) clearTimeout(voiceActivityTimeoutRef.current);
+      socket.off('pause');
+      socket.off('response_chunk');
+      socket.off('audio_response');
+      socket.off('response_done');
+      socket.off('error');
     };
-  }, [isListening, startListening, stopListening]);
+  }, [startListening, playNextAudio, stopAudioPlayback]);
 
   console.log('Pause button render: isListening:', isListening, 'isPaused:', isPaused);
   console.log('RENDER: messages =', messages);
@@ -421,19 +486,18 @@ const App: React.FC = () => {
                   // PAUSE
                   socketRef.current?.emit('pause');
                   stopListening();
-                  if (audioRef.current) {
-                    audioRef.current.pause();
-                    audioRef.current.currentTime = 0;
-                  }
+                  stopAudioPlayback();
                   if (botResponseBuffer.current.trim()) {
                     setMessages(prev => [...prev, botResponseBuffer.current.trim()]);
                     botResponseBuffer.current = '';
                   }
+                  isPausedRef.current = true;
                   setIsPaused(true);
                   if (resumeTimeoutRef.current) clearTimeout(resumeTimeoutRef.current);
                 } else {
                   // RESUME
                   socketRef.current?.emit('resume');
+                  isPausedRef.current = false;
                   setIsPaused(false);
                   // Do NOT start listening here; resume will stream the rest of the previous answer
                 }